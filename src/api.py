@@ -2,50 +2,80 @@
 FastAPI application for audio processing, health checks, and metrics.
 """
 
+import asyncio
 import logging
 import io
+import multiprocessing
+import os
 import time
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Optional
 from datetime import datetime, timezone
 
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.responses import JSONResponse, StreamingResponse
+import anyio
+import orjson
+from fastapi import FastAPI, HTTPException, UploadFile, File, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
 
 from .config import settings
-from .audio_processor import processor
+from .audio_processor import get_processor, init_worker, process_file
 
 logger = logging.getLogger(__name__)
 
 # =============================================================================
 # Prometheus Metrics
 # =============================================================================
-PROCESSED_COUNTER = Counter(
-    'audio_files_processed_total',
-    'Total number of audio files processed',
-    ['status']
+PROCESSED_SUCCESS = Counter(
+    'audio_files_processed_success_total',
+    'Total number of audio files processed successfully'
+)
+
+PROCESSED_ERROR = Counter(
+    'audio_files_processed_error_total',
+    'Total number of audio files that failed processing'
 )
 
 PROCESSING_DURATION = Histogram(
     'audio_processing_duration_seconds',
     'Audio processing duration in seconds',
-    buckets=[1, 5, 10, 30, 60, 120, 300, 600]
+    buckets=[5, 30, 120, 600]
 )
 
 FILE_SIZE_HISTOGRAM = Histogram(
     'audio_file_size_bytes',
     'Input audio file size in bytes',
-    buckets=[1e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8]
+    buckets=[1e6, 1e7, 1e8]
 )
 
 COMPRESSION_RATIO = Histogram(
     'audio_compression_ratio',
     'Output size as ratio of input size',
-    buckets=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+    buckets=[0.25, 0.5, 0.75]
 )
 
 
+# With several uvicorn workers each process keeps its own values; in
+# multiprocess mode (PROMETHEUS_MULTIPROC_DIR, set by main() for workers > 1)
+# they are written to shared files and aggregated at scrape time
+_MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+if _MULTIPROCESS:
+    _METRICS_REGISTRY = CollectorRegistry()
+    multiprocess.MultiProcessCollector(_METRICS_REGISTRY)
+else:
+    _METRICS_REGISTRY = REGISTRY
+
+
+def _counter_value(counter: Counter) -> int:
+    """Return a counter's total across all worker processes."""
+    if _MULTIPROCESS:
+        return int(_METRICS_REGISTRY.get_sample_value(f"{counter._name}_total") or 0)
+    return int(counter._value.get())
+
+
 # =============================================================================
 # API Models
 # =============================================================================
@@ -71,48 +101,136 @@ app = FastAPI(
     title="Audio Preprocessing Service",
     description="Preprocess audio files for speech-to-text services",
     version=settings.app_version,
+    default_response_class=ORJSONResponse,
     docs_url="/docs" if settings.debug else None,
     redoc_url="/redoc" if settings.debug else None
 )
 
-# Track startup time
-_startup_time = datetime.now(timezone.utc)
+# Allowance for multipart boundaries and part headers on top of the file itself
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """Reject /process requests whose Content-Length exceeds the upload limit.
+
+    Runs before the multipart body is parsed, so oversized uploads are
+    refused without being transferred or spooled to disk. Content-Length
+    covers the whole multipart body, so this is only a coarse bound; the
+    exact file-size check happens in process_audio.
+    """
+    
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/process":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_bytes:
+                        PROCESSED_ERROR.inc()
+                        size_mb = int(value) / (1024 * 1024)
+                        response = ORJSONResponse(
+                            {"detail": f"Request body too large: {size_mb:.1f}MB (max file size: {settings.processing.max_file_size_mb}MB)"},
+                            status_code=413
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.processing.max_file_size_mb * 1024 * 1024 + _MULTIPART_OVERHEAD_BYTES
+)
+
+# Track startup time (monotonic, for uptime)
+_startup_monotonic = time.monotonic()
+
+# Limits concurrent pipeline runs; created lazily inside the event loop
+_process_limiter: Optional[anyio.CapacityLimiter] = None
+
+# Worker processes for processing.process_pool; created on first use
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+# Cached ISO timestamp for health probes: (epoch seconds, isoformat string)
+_ts_cache = (0.0, "")
+
+# Settings are loaded once at startup, so the config payloads never change
+_HEALTH_PAYLOAD = {
+    "status": "healthy",
+    "version": settings.app_version,
+    "environment": settings.environment,
+    "config": {
+        "vad_enabled": settings.vad.enabled,
+        "noise_reduction_enabled": settings.noise.enabled,
+        "target_sample_rate": settings.audio.target_sample_rate,
+    }
+}
+
+_CONFIG_PAYLOAD = {
+    "app_name": settings.app_name,
+    "app_version": settings.app_version,
+    "environment": settings.environment,
+    "audio": {
+        "target_sample_rate": settings.audio.target_sample_rate,
+        "target_channels": settings.audio.target_channels,
+        "supported_extensions": settings.audio.supported_extensions
+    },
+    "vad": {
+        "enabled": settings.vad.enabled,
+        "threshold": settings.vad.threshold,
+        "min_speech_duration_ms": settings.vad.min_speech_duration_ms
+    },
+    "silence": {
+        "enabled": settings.silence.enabled,
+        "max_gap_ms": settings.silence.max_gap_ms,
+        "keep_ms": settings.silence.keep_ms
+    },
+    "noise": {
+        "enabled": settings.noise.enabled,
+        "stationary": settings.noise.stationary
+    },
+    "normalize": {
+        "enabled": settings.normalize.enabled,
+        "target_dbfs": settings.normalize.target_dbfs
+    }
+}
+_CONFIG_BYTES = orjson.dumps(_CONFIG_PAYLOAD)
 
-# Track processing stats
-_processed_count = 0
-_error_count = 0
+_READY_BYTES = b'{"status":"ready"}'
 
 
 # =============================================================================
 # Health & Metrics Endpoints
 # =============================================================================
+def _cached_timestamp() -> str:
+    """Return the current UTC ISO timestamp, refreshed at most every 0.5s."""
+    global _ts_cache
+    now = time.time()
+    if now - _ts_cache[0] > 0.5:
+        _ts_cache = (now, datetime.fromtimestamp(now, timezone.utc).isoformat())
+    return _ts_cache[1]
+
+
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
     """Health check endpoint for container orchestration."""
-    return HealthResponse(
-        status="healthy",
-        timestamp=datetime.now(timezone.utc).isoformat(),
-        version=settings.app_version,
-        environment=settings.environment,
-        config={
-            "vad_enabled": settings.vad.enabled,
-            "noise_reduction_enabled": settings.noise.enabled,
-            "target_sample_rate": settings.audio.target_sample_rate,
-        }
-    )
+    return ORJSONResponse({**_HEALTH_PAYLOAD, "timestamp": _cached_timestamp()})
 
 
 @app.get("/ready", tags=["Health"])
 async def readiness_check():
     """Readiness check - service is always ready."""
-    return {"status": "ready"}
+    return Response(content=_READY_BYTES, media_type="application/json")
 
 
 @app.get("/metrics", tags=["Metrics"])
 async def metrics():
     """Prometheus metrics endpoint."""
-    return JSONResponse(
-        content=generate_latest().decode('utf-8'),
+    return Response(
+        content=generate_latest(_METRICS_REGISTRY),
         media_type=CONTENT_TYPE_LATEST
     )
 
@@ -120,22 +238,60 @@ async def metrics():
 @app.get("/stats", response_model=StatsResponse, tags=["Metrics"])
 async def get_stats():
     """Get processing statistics."""
-    global _processed_count, _error_count
-    total = _processed_count + _error_count
-    success_rate = _processed_count / total if total > 0 else 0.0
-    uptime = (datetime.now(timezone.utc) - _startup_time).total_seconds()
+    # Derived from the Prometheus counters so there is a single source of truth
+    processed_count = _counter_value(PROCESSED_SUCCESS)
+    error_count = _counter_value(PROCESSED_ERROR)
+    total = processed_count + error_count
+    success_rate = processed_count / total if total > 0 else 0.0
+    uptime = time.monotonic() - _startup_monotonic
     
-    return StatsResponse(
-        processed_count=_processed_count,
-        error_count=_error_count,
-        success_rate=round(success_rate, 3),
-        uptime_seconds=round(uptime, 1)
-    )
+    return ORJSONResponse({
+        "processed_count": processed_count,
+        "error_count": error_count,
+        "success_rate": round(success_rate, 3),
+        "uptime_seconds": round(uptime, 1)
+    })
 
 
 # =============================================================================
 # Processing Endpoints
 # =============================================================================
+def _get_process_limiter() -> anyio.CapacityLimiter:
+    """Return the limiter bounding concurrent processing to max_concurrent."""
+    global _process_limiter
+    if _process_limiter is None:
+        _process_limiter = anyio.CapacityLimiter(settings.processing.max_concurrent)
+    return _process_limiter
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Return the worker pool, each worker loading its own VAD session."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.processing.max_concurrent,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker
+        )
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the worker pool, if one was started."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+def _spooled_size(fileobj: BinaryIO) -> int:
+    """Return the size of an uploaded file and rewind it."""
+    fileobj.seek(0, io.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
 @app.post("/process", tags=["Processing"])
 async def process_audio(file: UploadFile = File(...)):
     """
@@ -143,16 +299,12 @@ async def process_audio(file: UploadFile = File(...)):
     
     Accepts audio file upload and returns processed 16-bit PCM WAV.
     """
-    global _processed_count, _error_count
-    
-    start_time = time.time()
+    start_time = time.monotonic()
     
     try:
-        # Read the uploaded file into memory
-        audio_data = await file.read()
-        
-        # Check file size
-        file_size_mb = len(audio_data) / (1024 * 1024)
+        # Check file size on the spooled upload without reading it into memory
+        file_size = await anyio.to_thread.run_sync(_spooled_size, file.file)
+        file_size_mb = file_size / (1024 * 1024)
         if file_size_mb > settings.processing.max_file_size_mb:
             raise HTTPException(
                 status_code=413,
@@ -160,19 +312,33 @@ async def process_audio(file: UploadFile = File(...)):
             )
         
         # Update metrics
-        FILE_SIZE_HISTOGRAM.observe(len(audio_data))
+        FILE_SIZE_HISTOGRAM.observe(file_size)
         
         # Process the audio
         logger.info(f"Processing uploaded file: {file.filename} ({file_size_mb:.2f}MB)")
         
-        output_audio, stats = processor.process(audio_data, file.filename or "uploaded_audio")
+        filename = file.filename or "uploaded_audio"
+        if settings.processing.process_pool:
+            # Worker processes escape the GIL; the upload has to be sent as bytes,
+            # so it is only read once a slot is free
+            async with _get_process_limiter():
+                data = await anyio.to_thread.run_sync(file.file.read)
+                output_audio, stats = await asyncio.get_running_loop().run_in_executor(
+                    _get_process_pool(), process_file, data, filename
+                )
+        else:
+            # Run the CPU-bound pipeline off the event loop so other requests are served.
+            # The decoder reads straight from the spooled temp file.
+            output_audio, stats = await anyio.to_thread.run_sync(
+                get_processor().process, file.file, filename,
+                limiter=_get_process_limiter()
+            )
         
         # Update metrics
-        duration = time.time() - start_time
+        duration = time.monotonic() - start_time
         PROCESSING_DURATION.observe(duration)
-        PROCESSED_COUNTER.labels(status="success").inc()
+        PROCESSED_SUCCESS.inc()
         COMPRESSION_RATIO.observe(1 - stats.compression_ratio)
-        _processed_count += 1
         
         logger.info(
             f"Processed {file.filename}: "
@@ -180,9 +346,9 @@ async def process_audio(file: UploadFile = File(...)):
             f"({stats.compression_ratio:.1%} reduction) in {duration:.2f}s"
         )
         
-        # Return the processed audio as a streaming response
-        return StreamingResponse(
-            io.BytesIO(output_audio),
+        # Return the processed audio (already fully in memory; no extra copy)
+        return Response(
+            content=memoryview(output_audio),
             media_type="audio/wav",
             headers={
                 "Content-Disposition": f'attachment; filename="processed_{file.filename}.wav"',
@@ -193,10 +359,12 @@ async def process_audio(file: UploadFile = File(...)):
             }
         )
         
+    except HTTPException:
+        PROCESSED_ERROR.inc()
+        raise
+        
     except Exception as e:
-        duration = time.time() - start_time
-        PROCESSED_COUNTER.labels(status="error").inc()
-        _error_count += 1
+        PROCESSED_ERROR.inc()
         logger.error(f"Error processing {file.filename}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
@@ -204,31 +372,4 @@ async def process_audio(file: UploadFile = File(...)):
 @app.get("/config", tags=["Config"])
 async def get_config():
     """Get current configuration (safe values only)."""
-    return {
-        "app_name": settings.app_name,
-        "app_version": settings.app_version,
-        "environment": settings.environment,
-        "audio": {
-            "target_sample_rate": settings.audio.target_sample_rate,
-            "target_channels": settings.audio.target_channels,
-            "supported_extensions": settings.audio.supported_extensions
-        },
-        "vad": {
-            "enabled": settings.vad.enabled,
-            "threshold": settings.vad.threshold,
-            "min_speech_duration_ms": settings.vad.min_speech_duration_ms
-        },
-        "silence": {
-            "enabled": settings.silence.enabled,
-            "max_gap_ms": settings.silence.max_gap_ms,
-            "keep_ms": settings.silence.keep_ms
-        },
-        "noise": {
-            "enabled": settings.noise.enabled,
-            "stationary": settings.noise.stationary
-        },
-        "normalize": {
-            "enabled": settings.normalize.enabled,
-            "target_dbfs": settings.normalize.target_dbfs
-        }
-    }
+    return Response(content=_CONFIG_BYTES, media_type="application/json")
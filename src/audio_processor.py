@@ -2,9 +2,9 @@
 Audio processing pipeline optimized for STT services.
 
 Pipeline stages:
-1. Load and decode audio (any format via librosa/soundfile)
-2. Resample to target rate (default: 16kHz)
-3. Convert to mono
+1. Load and decode audio (soundfile for WAV/FLAC/OGG, PyAV for the rest)
+2. Convert to mono
+3. Resample to target rate (default: 16kHz)
 4. Optional: Noise reduction (spectral gating)
 5. VAD: Detect speech segments (Silero VAD)
 6. Silence compression
@@ -12,21 +12,104 @@ Pipeline stages:
 8. Export as 16-bit PCM WAV
 """
 
+import hashlib
 import io
 import logging
-from dataclasses import dataclass, field
-from typing import Optional, Tuple, List, Dict, Any
+import os
+import struct
+import threading
+import urllib.request
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple, List, Dict, Any, Union
 
+import av
 import numpy as np
 import soundfile as sf
-import librosa
+import scipy.fft
+import soxr
+from numba import njit
+from scipy import signal
+from scipy.ndimage import uniform_filter, uniform_filter1d
 
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
+# Route scipy's FFTs (the noise-reduction STFT) through FFTW with cached plans,
+# falling back to scipy's bundled pocketfft when pyFFTW isn't installed
+try:
+    import pyfftw
+    import pyfftw.interfaces.scipy_fft
+    
+    pyfftw.config.NUM_THREADS = 1
+    pyfftw.interfaces.cache.enable()
+    pyfftw.interfaces.cache.set_keepalive_time(60)
+    scipy.fft.set_global_backend(pyfftw.interfaces.scipy_fft)
+except ImportError:
+    pass
+
+# Windows each batched VAD stream replays from before its start so the LSTM
+# state has settled by the first kept output (~2min at 16kHz); shorter
+# replays left noisy speech visibly off the sequential result
+_STREAM_WARMUP_WINDOWS = 4000
+
+# Minimum windows per batched VAD stream (~4min), keeping the warm-up overhead
+# <= 50% and the number of state restarts low
+_MIN_STREAM_WINDOWS = 2 * _STREAM_WARMUP_WINDOWS
+
+# Formats decoded natively by libsndfile (fast path, no ffmpeg)
+_SOUNDFILE_EXTENSIONS = frozenset(("wav", "flac", "ogg"))
+
+# Canonical 44-byte RIFF header for mono 16-bit PCM
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+# Spectral gate parameters (noisereduce defaults)
+_GATE_STD_THRESH = 1.5          # stationary: dB above per-bin mean, in std devs
+_GATE_NONSTATIONARY_MULT = 2.0  # non-stationary: magnitude over running floor
+_GATE_NOISE_WINDOW_S = 2.0      # non-stationary running floor length
+_GATE_SMOOTH_HZ = 500           # mask smoothing across frequency
+_GATE_SMOOTH_MS = 50            # mask smoothing across time
+
+
+# Single-threaded on purpose: the passes are memory-bound, and they run
+# concurrently from request threads (or pool workers), which Numba's
+# parallel threading layers do not handle safely
+@njit(fastmath=True, cache=True)
+def _normalization_gain(audio: np.ndarray, target_dbfs: float) -> float:
+    """Linear gain reaching target_dbfs RMS, capped so the peak stays at 0.99."""
+    n = audio.shape[0]
+    sum_sq = 0.0
+    peak = 0.0
+    for i in range(n):
+        v = np.float64(audio[i])
+        sum_sq += v * v
+        peak = max(peak, abs(v))
+    
+    if n == 0 or sum_sq == 0.0:
+        return 1.0
+    
+    rms = np.sqrt(sum_sq / n)
+    gain = 10.0 ** ((target_dbfs - 20.0 * np.log10(rms + 1e-10)) / 20.0)
+    return min(gain, 0.99 / peak)
+
+
+@njit(fastmath=True, cache=True)
+def _scale_to_int16(audio: np.ndarray, gain: float, out: np.ndarray) -> None:
+    """Apply gain and write clipped 16-bit PCM into out in a single pass."""
+    n = audio.shape[0]
+    scale = gain * 32767.0
+    for i in range(n):
+        v = audio[i] * scale
+        if v > 32767.0:
+            v = 32767.0
+        elif v < -32768.0:
+            v = -32768.0
+        out[i] = np.int16(v)
 
-@dataclass
+
+@dataclass(slots=True)
 class ProcessingStats:
     """Statistics from audio processing."""
     original_duration_ms: int = 0
@@ -46,55 +129,263 @@ class ProcessingStats:
         return 1.0 - (self.final_duration_ms / self.original_duration_ms)
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "original_duration_ms": self.original_duration_ms,
-            "final_duration_ms": self.final_duration_ms,
-            "original_sample_rate": self.original_sample_rate,
-            "original_channels": self.original_channels,
-            "speech_segments": self.speech_segments,
-            "silence_removed_ms": self.silence_removed_ms,
-            "noise_reduced": self.noise_reduced,
-            "normalized": self.normalized,
-            "compression_ratio": round(self.compression_ratio, 3),
-            "stages_completed": self.stages_completed
-        }
+        return asdict(self) | {"compression_ratio": round(self.compression_ratio, 3)}
 
 
 class SileroVAD:
-    """Wrapper for Silero VAD model with lazy loading."""
+    """Silero VAD running directly on ONNX Runtime, with lazy loading."""
+    
+    # Pinned release and digest, so a model update is always a deliberate change
+    MODEL_URL = (
+        "https://github.com/snakers4/silero-vad/raw/v6.2.3/"
+        "src/silero_vad/data/silero_vad.onnx"
+    )
+    MODEL_SHA256 = "1a153a22f4509e292a94e67d6f9b85e8deb25b4988682b7e174c65279d8788e3"
     
     _instance = None
-    _model = None
-    _get_speech_timestamps = None
+    _session = None
+    _params: Optional[Dict[str, Any]] = None
+    _lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
     
+    def _model_path(self) -> Path:
+        """Resolve the ONNX model file, downloading it once if needed."""
+        if settings.vad.model_path:
+            return Path(settings.vad.model_path)
+        
+        # Pre-downloaded model shipped alongside the app (see config/README.md)
+        bundled = Path(__file__).resolve().parent.parent / "config" / "silero_vad.onnx"
+        if bundled.exists():
+            return bundled
+        
+        cached = Path.home() / ".cache" / "silero-vad" / "silero_vad.onnx"
+        if not cached.exists():
+            logger.info(f"Downloading Silero VAD model to {cached}")
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_suffix(".tmp")
+            urllib.request.urlretrieve(self.MODEL_URL, tmp)
+            digest = hashlib.sha256(tmp.read_bytes()).hexdigest()
+            if digest != self.MODEL_SHA256:
+                tmp.unlink()
+                raise RuntimeError(
+                    f"Silero VAD model checksum mismatch: {digest} (expected {self.MODEL_SHA256})"
+                )
+            tmp.replace(cached)
+        return cached
+    
     def _load_model(self):
-        """Load Silero VAD model (ONNX for efficiency)."""
-        if self._model is not None:
+        """Create the ONNX Runtime inference session."""
+        if self._session is not None:
             return
         
-        try:
-            # Try the silero-vad package first
-            from silero_vad import load_silero_vad, get_speech_timestamps
-            self._model = load_silero_vad(onnx=True)
-            self._get_speech_timestamps = get_speech_timestamps
-            logger.info("Silero VAD loaded via silero-vad package (ONNX)")
-        except ImportError:
-            # Fallback to torch.hub
-            import torch
-            torch.set_num_threads(1)
-            model, utils = torch.hub.load(
-                repo_or_dir='snakers4/silero-vad',
-                model='silero_vad',
-                onnx=True
+        with self._lock:
+            if self._session is not None:
+                return
+            
+            import onnxruntime as ort
+            
+            # Snapshot the VAD settings used on every call
+            vad = settings.vad
+            SileroVAD._params = {
+                "threshold": vad.threshold,
+                "min_speech_duration_ms": vad.min_speech_duration_ms,
+                "min_silence_duration_ms": vad.min_silence_duration_ms,
+                "speech_pad_ms": vad.speech_pad_ms,
+                "window_size_samples": vad.window_size_samples,
+                "batch_size": vad.batch_size,
+            }
+            
+            path = self._model_path()
+            SileroVAD._session = self._create_session(ort, path)
+            self._warmup()
+            logger.info(f"Silero VAD loaded via ONNX Runtime ({path})")
+    
+    @staticmethod
+    def _create_session(ort, path: Path):
+        """
+        Build the inference session, reusing a cached optimized graph.
+        
+        The first start runs ORT's portable (extended) graph optimizations and
+        serializes the result next to the model cache. The serving session is
+        loaded from that file with ORT_ENABLE_ALL, so only the hardware-specific
+        layout pass runs at each start and the cache stays valid on any node.
+        The cache is keyed on the model's content and the ORT version, so a
+        swapped model file or an ORT upgrade never reuses a stale graph.
+        """
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        optimized = (
+            Path.home() / ".cache" / "silero-vad"
+            / f"{digest[:16]}-ort{ort.__version__}.opt.onnx"
+        )
+        if not optimized.exists():
+            tmp = optimized.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                optimized.parent.mkdir(parents=True, exist_ok=True)
+                save_options = ort.SessionOptions()
+                save_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+                save_options.optimized_model_filepath = str(tmp)
+                ort.InferenceSession(str(path), save_options, providers=["CPUExecutionProvider"])
+                tmp.replace(optimized)
+            except Exception as e:
+                logger.warning(f"Could not cache optimized VAD model at {optimized}: {e}")
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # Pool workers each get one core; the pool provides the parallelism
+        options.intra_op_num_threads = (
+            1 if settings.processing.process_pool else (os.cpu_count() or 1)
+        )
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.enable_mem_pattern = True
+        
+        if optimized.exists():
+            try:
+                return ort.InferenceSession(
+                    str(optimized),
+                    options,
+                    providers=["CPUExecutionProvider"]
+                )
+            except Exception as e:
+                logger.warning(f"Ignoring cached optimized VAD model {optimized}: {e}")
+        
+        return ort.InferenceSession(
+            str(path),
+            options,
+            providers=["CPUExecutionProvider"]
+        )
+    
+    def _warmup(self):
+        """Run one dummy window so kernel selection happens before the first request."""
+        context_size = 64
+        window = self._params["window_size_samples"]
+        self._session.run(None, {
+            "input": np.zeros((1, context_size + window), dtype=np.float32),
+            "state": np.zeros((2, 1, 128), dtype=np.float32),
+            "sr": np.array(16000, dtype=np.int64),
+        })
+    
+    def _speech_probs(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        window: int
+    ) -> np.ndarray:
+        """
+        Run the model over consecutive windows, returning one probability each.
+        
+        With the default `vad.batch_size` of 1 this is a plain sequential pass
+        with the LSTM state chained through every window.
+        
+        Larger batch sizes split long audio into contiguous streams that are
+        stepped through the model together as one batch, each carrying its
+        own LSTM state. A fresh state never fully converges to the chained
+        one, so every stream after the first starts _STREAM_WARMUP_WINDOWS
+        early and those outputs are discarded; the kept probabilities then
+        track a sequential pass closely but not exactly (a few windows per
+        ten thousand can cross the threshold differently on noisy audio).
+        Audio shorter than two streams is always processed sequentially.
+        """
+        # The model expects each window prefixed with the tail of the previous one
+        context_size = 64 if sample_rate == 16000 else 32
+        n_windows = -(-len(audio) // window)
+        
+        n_streams = max(1, min(self._params["batch_size"], n_windows // _MIN_STREAM_WINDOWS))
+        steps = -(-n_windows // n_streams)
+        warmup = _STREAM_WARMUP_WINDOWS if n_streams > 1 else 0
+        
+        padded = np.zeros(context_size + n_streams * steps * window, dtype=np.float32)
+        padded[context_size:context_size + len(audio)] = audio
+        
+        # (windows, context + window) view into the padded audio
+        frames = np.lib.stride_tricks.sliding_window_view(
+            padded, context_size + window
+        )[::window]
+        
+        # Stream s keeps windows [s * steps, (s + 1) * steps) and is fed from
+        # `warmup` windows earlier; the first stream has nothing to replay and
+        # simply runs past its end instead
+        starts = np.maximum(np.arange(n_streams) * steps - warmup, 0)
+        offsets = np.arange(n_streams) * steps - starts
+        
+        state = np.zeros((2, n_streams, 128), dtype=np.float32)
+        sr = np.array(sample_rate, dtype=np.int64)
+        outputs = np.empty((n_streams, steps + warmup), dtype=np.float32)
+        
+        for j in range(steps + warmup):
+            out, state = self._session.run(
+                None,
+                {"input": frames[starts + j], "state": state, "sr": sr}
             )
-            self._model = model
-            self._get_speech_timestamps = utils[0]
-            logger.info("Silero VAD loaded via torch.hub (ONNX)")
+            outputs[:, j] = out[:, 0]
+        
+        kept = outputs[np.arange(n_streams)[:, None], offsets[:, None] + np.arange(steps)]
+        return kept.reshape(-1)[:n_windows]
+    
+    def _probs_to_segments(
+        self,
+        probs: np.ndarray,
+        window: int,
+        sample_rate: int,
+        audio_length: int
+    ) -> List[Dict[str, int]]:
+        """
+        Convert per-window probabilities to speech segments.
+        
+        Mirrors the hysteresis, min-duration and padding rules of
+        silero_vad.get_speech_timestamps.
+        """
+        params = self._params
+        threshold = params["threshold"]
+        neg_threshold = max(threshold - 0.15, 0.01)
+        min_speech_samples = sample_rate * params["min_speech_duration_ms"] / 1000
+        min_silence_samples = sample_rate * params["min_silence_duration_ms"] / 1000
+        pad_samples = int(sample_rate * params["speech_pad_ms"] / 1000)
+        
+        is_speech = probs >= threshold
+        is_silence = probs < neg_threshold
+        
+        speeches = []
+        start = None
+        temp_end = 0
+        for i in np.flatnonzero(is_speech | is_silence):
+            pos = int(i) * window
+            if is_speech[i]:
+                temp_end = 0
+                if start is None:
+                    start = pos
+            elif start is not None:
+                if not temp_end:
+                    temp_end = pos
+                if pos - temp_end >= min_silence_samples:
+                    if temp_end - start > min_speech_samples:
+                        speeches.append({"start": start, "end": temp_end})
+                    start = None
+                    temp_end = 0
+        
+        if start is not None and audio_length - start > min_speech_samples:
+            speeches.append({"start": start, "end": audio_length})
+        
+        # Pad segments, splitting the gap when neighbours are too close
+        for i, speech in enumerate(speeches):
+            if i == 0:
+                speech["start"] = max(0, speech["start"] - pad_samples)
+            if i < len(speeches) - 1:
+                nxt = speeches[i + 1]
+                gap = nxt["start"] - speech["end"]
+                if gap < 2 * pad_samples:
+                    speech["end"] += gap // 2
+                    nxt["start"] = max(0, nxt["start"] - gap // 2)
+                else:
+                    speech["end"] = min(audio_length, speech["end"] + pad_samples)
+                    nxt["start"] = max(0, nxt["start"] - pad_samples)
+            else:
+                speech["end"] = min(audio_length, speech["end"] + pad_samples)
+        
+        return speeches
     
     def detect_speech(
         self,
@@ -106,35 +397,34 @@ class SileroVAD:
         
         Args:
             audio: Audio samples as float32 numpy array
-            sample_rate: Sample rate (must be 16000 or 8000 for Silero)
+            sample_rate: Sample rate (resampled to 16000 unless 16000 or 8000)
             
         Returns:
-            List of dicts with 'start' and 'end' keys (in samples)
+            List of dicts with 'start' and 'end' keys (in samples at sample_rate)
         """
         self._load_model()
         
-        import torch
-        
         # Silero VAD requires 16kHz or 8kHz
+        orig_sr = sample_rate
         if sample_rate not in (8000, 16000):
-            audio = librosa.resample(audio, orig_sr=sample_rate, target_sr=16000)
+            audio = soxr.resample(audio, sample_rate, 16000, quality="HQ")
             sample_rate = 16000
         
-        # Convert to torch tensor
-        audio_tensor = torch.from_numpy(audio).float()
-        
-        # Get speech timestamps
-        timestamps = self._get_speech_timestamps(
-            audio_tensor,
-            self._model,
-            sampling_rate=sample_rate,
-            threshold=settings.vad.threshold,
-            min_speech_duration_ms=settings.vad.min_speech_duration_ms,
-            min_silence_duration_ms=settings.vad.min_silence_duration_ms,
-            speech_pad_ms=settings.vad.speech_pad_ms,
-            window_size_samples=settings.vad.window_size_samples,
-            return_seconds=False
-        )
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        window = self._params["window_size_samples"] * sample_rate // 16000
+        if len(audio) == 0:
+            return []
+        
+        probs = self._speech_probs(audio, sample_rate, window)
+        timestamps = self._probs_to_segments(probs, window, sample_rate, len(audio))
+        
+        # Map back to the caller's sample rate
+        if sample_rate != orig_sr:
+            scale = orig_sr / sample_rate
+            timestamps = [
+                {"start": int(ts["start"] * scale), "end": int(ts["end"] * scale)}
+                for ts in timestamps
+            ]
         
         return timestamps
 
@@ -144,60 +434,83 @@ class AudioProcessor:
     
     def __init__(self):
         self.vad = SileroVAD() if settings.vad.enabled else None
+        
+        # Settings are fixed for the process lifetime; read them once
+        self._mono = settings.audio.target_channels == 1
+        self._target_sr = settings.audio.target_sample_rate
+        self._noise_enabled = settings.noise.enabled
+        self._noise_stationary = settings.noise.stationary
+        self._noise_prop_decrease = settings.noise.prop_decrease
+        self._noise_n_fft = settings.noise.n_fft
+        self._silence_enabled = settings.silence.enabled
+        self._max_gap_ms = settings.silence.max_gap_ms
+        self._keep_ms = settings.silence.keep_ms
+        self._normalize_enabled = settings.normalize.enabled
+        self._target_dbfs = settings.normalize.target_dbfs
+        
+        # Load the model and JIT-compile the export kernels now so the first
+        # request doesn't pay for them
+        if self.vad:
+            self.vad._load_model()
+        warm = np.zeros(16, dtype=np.float32)
+        _scale_to_int16(warm, _normalization_gain(warm, self._target_dbfs), np.empty(16, dtype=np.int16))
     
     def process(
         self,
-        audio_data: bytes,
+        audio_data: Union[bytes, BinaryIO],
         filename: str
-    ) -> Tuple[bytes, ProcessingStats]:
+    ) -> Tuple[bytearray, ProcessingStats]:
         """
         Process audio through the full pipeline.
         
         Args:
-            audio_data: Raw audio file bytes
+            audio_data: Raw audio file bytes or a seekable binary file object
             filename: Original filename (for format detection)
             
         Returns:
-            Tuple of (processed WAV bytes, processing stats)
+            Tuple of (processed WAV buffer, processing stats)
         """
         stats = ProcessingStats()
         
         # Stage 1: Load audio
         logger.info(f"[1/7] Loading audio: {filename}")
-        audio, sr, channels = self._load_audio(audio_data, filename)
+        audio, sr, orig_sr, channels = self._load_audio(audio_data, filename)
         
-        stats.original_sample_rate = sr
+        stats.original_sample_rate = orig_sr
         stats.original_channels = channels
         stats.original_duration_ms = int(len(audio) / sr * 1000)
-        stats.stages_completed.append(f"loaded:{sr}Hz,{channels}ch")
+        stats.stages_completed.append(f"loaded:{orig_sr}Hz,{channels}ch")
+        
+        logger.info(f"  → {orig_sr}Hz, {channels}ch, {stats.original_duration_ms}ms")
         
-        logger.info(f"  → {sr}Hz, {channels}ch, {stats.original_duration_ms}ms")
+        # Stage 2: Convert to mono (before resampling, so it runs on one channel)
+        if audio.ndim > 1 and self._mono:
+            logger.info(f"[2/7] Converting to mono")
+            audio = audio.mean(axis=1, dtype=np.float32)
+            stats.stages_completed.append("mono:converted")
+        else:
+            logger.info(f"[2/7] Mono conversion: skipped")
+            stats.stages_completed.append("mono:skipped")
         
-        # Stage 2: Resample
-        target_sr = settings.audio.target_sample_rate
+        # Stage 3: Resample
+        target_sr = self._target_sr
         if sr != target_sr:
-            logger.info(f"[2/7] Resampling: {sr}Hz → {target_sr}Hz")
-            audio = librosa.resample(audio, orig_sr=sr, target_sr=target_sr)
+            logger.info(f"[3/7] Resampling: {sr}Hz → {target_sr}Hz")
+            audio = soxr.resample(audio, sr, target_sr, quality="HQ")
             sr = target_sr
             stats.stages_completed.append(f"resampled:{target_sr}Hz")
+        elif orig_sr != sr:
+            logger.info(f"[3/7] Resampling: {orig_sr}Hz → {sr}Hz (in decoder)")
+            stats.stages_completed.append(f"resampled:{target_sr}Hz")
         else:
-            logger.info(f"[2/7] Resampling: skipped (already {sr}Hz)")
+            logger.info(f"[3/7] Resampling: skipped (already {sr}Hz)")
             stats.stages_completed.append("resample:skipped")
         
-        # Stage 3: Convert to mono
-        if audio.ndim > 1 and settings.audio.target_channels == 1:
-            logger.info(f"[3/7] Converting to mono")
-            audio = np.mean(audio, axis=0) if audio.shape[0] <= 2 else np.mean(audio, axis=1)
-            stats.stages_completed.append("mono:converted")
-        else:
-            logger.info(f"[3/7] Mono conversion: skipped")
-            stats.stages_completed.append("mono:skipped")
-        
-        # Ensure 1D array and float32
-        audio = audio.flatten().astype(np.float32)
+        # Ensure 1D float32 (no copy when the stages above already produced one)
+        audio = np.ascontiguousarray(audio.reshape(-1), dtype=np.float32)
         
         # Stage 4: Noise reduction
-        if settings.noise.enabled:
+        if self._noise_enabled:
             logger.info(f"[4/7] Applying noise reduction")
             audio = self._reduce_noise(audio, sr)
             stats.noise_reduced = True
@@ -207,7 +520,7 @@ class AudioProcessor:
             stats.stages_completed.append("noise_reduction:disabled")
         
         # Stage 5: VAD
-        if settings.vad.enabled and self.vad:
+        if self.vad:
             logger.info(f"[5/7] Running Silero VAD")
             speech_timestamps = self.vad.detect_speech(audio, sr)
             stats.speech_segments = len(speech_timestamps)
@@ -219,7 +532,7 @@ class AudioProcessor:
             stats.stages_completed.append("vad:disabled")
         
         # Stage 6: Silence compression
-        if settings.silence.enabled and speech_timestamps:
+        if self._silence_enabled and speech_timestamps:
             logger.info(f"[6/7] Compressing silences")
             audio, removed_ms = self._compress_silences(audio, speech_timestamps, sr)
             stats.silence_removed_ms = removed_ms
@@ -229,19 +542,20 @@ class AudioProcessor:
             logger.info(f"[6/7] Silence compression: disabled")
             stats.stages_completed.append("silence_compression:disabled")
         
-        # Stage 7: Normalization
-        if settings.normalize.enabled:
-            logger.info(f"[7/7] Normalizing to {settings.normalize.target_dbfs} dBFS")
-            audio = self._normalize(audio, settings.normalize.target_dbfs)
+        # Stage 7: Normalization (gain is applied during the int16 export)
+        gain = 1.0
+        if self._normalize_enabled:
+            logger.info(f"[7/7] Normalizing to {self._target_dbfs} dBFS")
+            gain = _normalization_gain(audio, self._target_dbfs)
             stats.normalized = True
-            stats.stages_completed.append(f"normalized:{settings.normalize.target_dbfs}dBFS")
+            stats.stages_completed.append(f"normalized:{self._target_dbfs}dBFS")
         else:
             logger.info(f"[7/7] Normalization: disabled")
             stats.stages_completed.append("normalization:disabled")
         
         # Export as 16-bit PCM WAV
         logger.info(f"[Export] Creating WAV output")
-        wav_bytes = self._export_wav(audio, sr)
+        wav_bytes = self._export_wav(audio, sr, gain)
         
         stats.final_duration_ms = int(len(audio) / sr * 1000)
         
@@ -254,50 +568,116 @@ class AudioProcessor:
     
     def _load_audio(
         self,
-        audio_data: bytes,
+        audio_data: Union[bytes, BinaryIO],
         filename: str
-    ) -> Tuple[np.ndarray, int, int]:
-        """Load audio from bytes, return (samples, sample_rate, channels)."""
-        ext = filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
-        buffer = io.BytesIO(audio_data)
+    ) -> Tuple[np.ndarray, int, int, int]:
+        """
+        Load audio from bytes or a file object.
+        
+        Returns:
+            Tuple of (samples, sample_rate, original_sample_rate, original_channels).
+            Samples are (samples,) for mono or (samples, channels) otherwise.
+        """
+        _, dot, ext = filename.rpartition(".")
+        ext = ext.lower() if dot else ""
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            buffer = io.BytesIO(audio_data)
+        else:
+            buffer = audio_data
+            buffer.seek(0)
         
         try:
             # Try soundfile first (faster for WAV, FLAC, OGG)
-            if ext in ("wav", "flac", "ogg"):
+            if ext in _SOUNDFILE_EXTENSIONS:
                 audio, sr = sf.read(buffer, dtype='float32')
                 channels = 1 if audio.ndim == 1 else audio.shape[1]
-                return audio, sr, channels
+                return audio, sr, sr, channels
         except Exception:
             buffer.seek(0)
         
-        # Use librosa for everything else (uses ffmpeg via audioread)
-        audio, sr = librosa.load(buffer, sr=None, mono=False)
+        return self._decode_av(buffer)
+    
+    def _decode_av(self, buffer: BinaryIO) -> Tuple[np.ndarray, int, int, int]:
+        """
+        Decode any ffmpeg-supported format in-process with PyAV.
         
-        # librosa returns (samples,) for mono, (channels, samples) for stereo
-        if audio.ndim == 1:
-            channels = 1
-        else:
-            channels = audio.shape[0]
-            audio = audio.T  # Transpose to (samples, channels)
+        Resampling to the target rate happens inside the decoder's
+        swresample pass, so stage 3 becomes a no-op. Channels are kept and
+        left to stage 2: swresample's mono downmix is not an equal-weight
+        mean and would come out louder than the soundfile path.
+        """
+        target_sr = self._target_sr
+        
+        # Explicit read mode: PyAV would otherwise follow the file object's own
+        # mode, and the spooled upload is opened "w+b"
+        with av.open(buffer, mode="r") as container:
+            stream = container.streams.audio[0]
+            orig_sr = stream.codec_context.sample_rate
+            channels = len(stream.codec_context.layout.channels)
+            
+            # Packed float32 output; layout=None keeps the source layout
+            resampler = av.AudioResampler(format="flt", layout=None, rate=target_sr)
+            
+            chunks = []
+            for frame in container.decode(stream):
+                for out in resampler.resample(frame):
+                    chunks.append(out.to_ndarray().reshape(-1))
+            for out in resampler.resample(None):
+                chunks.append(out.to_ndarray().reshape(-1))
+        
+        if not chunks:
+            raise ValueError("No audio frames decoded")
         
-        return audio, sr, channels
+        audio = np.concatenate(chunks)
+        if channels > 1:
+            audio = audio.reshape(-1, channels)
+        
+        return audio, target_sr, orig_sr, channels
     
     def _reduce_noise(self, audio: np.ndarray, sr: int) -> np.ndarray:
         """Apply spectral gating noise reduction."""
         try:
-            import noisereduce as nr
-            return nr.reduce_noise(
-                y=audio,
-                sr=sr,
-                stationary=settings.noise.stationary,
-                prop_decrease=settings.noise.prop_decrease,
-                n_fft=settings.noise.n_fft,
-                n_jobs=1
-            )
+            return self._spectral_gate(audio, sr)
         except Exception as e:
             logger.warning(f"Noise reduction failed: {e}")
             return audio
     
+    def _spectral_gate(self, audio: np.ndarray, sr: int) -> np.ndarray:
+        """
+        Spectral gate in float32 on a scipy STFT.
+        
+        Stationary mode thresholds each bin against its mean + std (in dB)
+        over the whole file; non-stationary mode against a running magnitude
+        floor. The binary mask is smoothed, then blended by prop_decrease.
+        """
+        n_fft = self._noise_n_fft
+        hop = n_fft // 4
+        noverlap = n_fft - hop
+        
+        _, _, spec = signal.stft(audio, fs=sr, nperseg=n_fft, noverlap=noverlap)
+        mag = np.abs(spec)
+        
+        if self._noise_stationary:
+            db = 20 * np.log10(mag + 1e-10)
+            thresh = db.mean(axis=1, keepdims=True) + _GATE_STD_THRESH * db.std(axis=1, keepdims=True)
+            mask = db > thresh
+        else:
+            frames = max(1, int(_GATE_NOISE_WINDOW_S * sr / hop))
+            floor = uniform_filter1d(mag, size=frames, axis=1)
+            mask = mag > _GATE_NONSTATIONARY_MULT * floor
+        
+        smooth = (
+            max(1, int(_GATE_SMOOTH_HZ * n_fft / sr)),
+            max(1, int(_GATE_SMOOTH_MS * sr / 1000 / hop))
+        )
+        mask = uniform_filter(mask.astype(np.float32), size=smooth)
+        
+        prop = self._noise_prop_decrease
+        spec *= (1 - prop) + prop * mask
+        
+        _, out = signal.istft(spec, fs=sr, nperseg=n_fft, noverlap=noverlap)
+        return out[:len(audio)].astype(np.float32, copy=False)
+    
     def _compress_silences(
         self,
         audio: np.ndarray,
@@ -308,62 +688,71 @@ class AudioProcessor:
         if not speech_segments:
             return audio, 0
         
-        max_gap_samples = int(settings.silence.max_gap_ms * sr / 1000)
-        keep_samples = int(settings.silence.keep_ms * sr / 1000)
-        
-        chunks = []
-        total_removed = 0
-        
-        for i, seg in enumerate(speech_segments):
-            # Add speech segment
-            chunks.append(audio[seg["start"]:seg["end"]])
-            
-            # Handle gap to next segment
-            if i < len(speech_segments) - 1:
-                gap_start = seg["end"]
-                gap_end = speech_segments[i + 1]["start"]
-                gap_length = gap_end - gap_start
-                
-                if gap_length > max_gap_samples:
-                    # Compress: keep only specified silence
-                    chunks.append(np.zeros(keep_samples, dtype=audio.dtype))
-                    total_removed += gap_length - keep_samples
-                elif gap_length > 0:
-                    # Keep original gap
-                    chunks.append(audio[gap_start:gap_end])
+        max_gap_samples = int(self._max_gap_ms * sr / 1000)
+        keep_samples = int(self._keep_ms * sr / 1000)
+        
+        n = len(speech_segments)
+        starts = np.fromiter((seg["start"] for seg in speech_segments), dtype=np.int64, count=n)
+        ends = np.fromiter((seg["end"] for seg in speech_segments), dtype=np.int64, count=n)
+        
+        # Long gaps shrink to keep_samples, short ones are kept as-is
+        gaps = np.maximum(starts[1:] - ends[:-1], 0)
+        kept_gaps = np.where(gaps > max_gap_samples, keep_samples, gaps)
+        total_removed = int((gaps - kept_gaps).sum())
+        
+        # Output offset of every segment and gap, laid out segment, gap, segment, ...
+        lengths = np.empty(2 * n - 1, dtype=np.int64)
+        lengths[0::2] = ends - starts
+        lengths[1::2] = kept_gaps
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        
+        out = np.empty(int(offsets[-1]), dtype=audio.dtype)
+        for i in range(n):
+            o = offsets[2 * i]
+            out[o:offsets[2 * i + 1]] = audio[starts[i]:ends[i]]
+            if i < n - 1:
+                g = offsets[2 * i + 1]
+                if gaps[i] > max_gap_samples:
+                    out[g:offsets[2 * i + 2]] = 0
+                else:
+                    out[g:offsets[2 * i + 2]] = audio[ends[i]:starts[i + 1]]
         
         removed_ms = int(total_removed * 1000 / sr)
-        return np.concatenate(chunks), removed_ms
+        return out, removed_ms
     
-    def _normalize(self, audio: np.ndarray, target_dbfs: float) -> np.ndarray:
-        """Normalize audio to target dBFS level."""
-        rms = np.sqrt(np.mean(audio ** 2))
-        if rms == 0:
-            return audio
-        
-        current_dbfs = 20 * np.log10(rms + 1e-10)
-        gain_db = target_dbfs - current_dbfs
-        gain_linear = 10 ** (gain_db / 20)
-        
-        normalized = audio * gain_linear
-        
-        # Prevent clipping
-        peak = np.max(np.abs(normalized))
-        if peak > 0.99:
-            normalized = normalized * (0.99 / peak)
+    def _export_wav(self, audio: np.ndarray, sr: int, gain: float = 1.0) -> bytearray:
+        """
+        Export mono audio as 16-bit PCM WAV, applying the normalization gain.
         
-        return normalized
-    
-    def _export_wav(self, audio: np.ndarray, sr: int) -> bytes:
-        """Export audio as 16-bit PCM WAV."""
-        # Convert to 16-bit integers
-        audio_int16 = np.clip(audio * 32767, -32768, 32767).astype(np.int16)
+        The output buffer is allocated once at its final size; the header is
+        packed in place and the samples are written straight after it.
+        """
+        data_size = 2 * len(audio)
+        buffer = bytearray(_WAV_HEADER.size + data_size)
+        _WAV_HEADER.pack_into(
+            buffer, 0,
+            b"RIFF", 36 + data_size, b"WAVE",
+            b"fmt ", 16, 1, 1, sr, sr * 2, 2, 16,
+            b"data", data_size
+        )
         
-        buffer = io.BytesIO()
-        sf.write(buffer, audio_int16, sr, format='WAV', subtype='PCM_16')
+        samples = np.frombuffer(buffer, dtype="<i2", offset=_WAV_HEADER.size)
+        _scale_to_int16(audio, gain, samples)
         
-        return buffer.getvalue()
+        return buffer
+
+
+@lru_cache(maxsize=1)
+def get_processor() -> AudioProcessor:
+    """Return the process-wide processor, creating (and warming) it on first use."""
+    return AudioProcessor()
+
+
+def init_worker() -> None:
+    """Process-pool initializer: build the worker's processor and VAD session."""
+    get_processor()
 
 
-# Global processor instance
-processor = AudioProcessor()
+def process_file(audio_data: bytes, filename: str) -> Tuple[bytearray, ProcessingStats]:
+    """Picklable entry point running the pipeline on the worker's processor."""
+    return get_processor().process(audio_data, filename)
@@ -4,8 +4,8 @@ Configuration management using Pydantic Settings.
 All configuration is loaded from environment variables with sensible defaults.
 """
 
-from typing import Literal
-from pydantic import Field
+from typing import Literal, Optional
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -72,7 +72,19 @@ class VADSettings(BaseSettings):
     )
     window_size_samples: int = Field(
         default=512,
-        description="VAD window size in samples"
+        description="VAD window size in samples at 16kHz (Silero v5+ requires 512)"
+    )
+    batch_size: int = Field(
+        default=1,
+        ge=1,
+        description=(
+            "Parallel audio streams per VAD inference call (long audio only); "
+            ">1 is faster but only approximates the sequential result"
+        )
+    )
+    model_path: Optional[str] = Field(
+        default=None,
+        description="Path to the Silero VAD ONNX model (downloaded if unset)"
     )
 
 
@@ -168,6 +180,10 @@ class ProcessingSettings(BaseSettings):
         default=4,
         description="Maximum concurrent processing tasks"
     )
+    process_pool: bool = Field(
+        default=False,
+        description="Run processing in max_concurrent worker processes instead of threads"
+    )
     retry_attempts: int = Field(
         default=3,
         description="Number of retry attempts on failure"
@@ -186,7 +202,10 @@ class ServerSettings(BaseSettings):
     host: str = Field(default="0.0.0.0")
     port: int = Field(default=8080)
     workers: int = Field(default=1)
-    log_level: str = Field(default="info")
+    log_level: str = Field(
+        default="warning",
+        description="Level for uvicorn's own loggers (application logs follow DEBUG)"
+    )
 
 
 class AppSettings(BaseSettings):
@@ -213,6 +232,13 @@ class AppSettings(BaseSettings):
     normalize: NormalizationSettings = Field(default_factory=NormalizationSettings)
     processing: ProcessingSettings = Field(default_factory=ProcessingSettings)
     server: ServerSettings = Field(default_factory=ServerSettings)
+    
+    @model_validator(mode="after")
+    def _check_pool_workers(self) -> "AppSettings":
+        # Every uvicorn worker would start its own pool of max_concurrent processes
+        if self.processing.process_pool and self.server.workers > 1:
+            raise ValueError("PROCESSING_PROCESS_POOL requires SERVER_WORKERS=1")
+        return self
 
 
 # Global settings instance
@@ -3,14 +3,17 @@ Main entry point for the audio preprocessing service.
 """
 
 import logging
+import os
 import sys
+import tempfile
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
 
 from .config import settings
-from .api import app as api_app
+from .api import app as api_app, shutdown_process_pool
+from .audio_processor import get_processor
 
 # Configure logging
 logging.basicConfig(
@@ -31,8 +34,13 @@ async def lifespan(app: FastAPI):
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
     logger.info(f"Environment: {settings.environment}")
     
+    # Load the VAD model before serving; pool workers build their own
+    if not settings.processing.process_pool:
+        get_processor()
+    
     yield
     
+    shutdown_process_pool()
     logger.info("Shutdown complete")
 
 
@@ -59,14 +67,28 @@ def main():
     logger.info(f"Target format:   {settings.audio.target_sample_rate}Hz, {settings.audio.target_channels}ch, {settings.audio.target_bit_depth}bit")
     logger.info("=" * 60)
     
-    # Run the server
+    # Worker processes share Prometheus metrics through files in this directory;
+    # it must be set before the workers import the metrics
+    if settings.server.workers > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+    
+    # Run the server. An import string is required for uvicorn to spawn
+    # multiple worker processes; each worker imports this module, so the
+    # lifespan hook above is attached in every worker.
     uvicorn.run(
-        api_app,
+        "src.main:api_app",
         host=settings.server.host,
         port=settings.server.port,
         workers=settings.server.workers,
-        log_level=settings.server.log_level,
-        access_log=settings.debug
+        # C event loop and HTTP parser (uvloop has no Windows build)
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        lifespan="on",
+        log_level="debug" if settings.debug else settings.server.log_level,
+        # No per-request access lines; uvicorn's loggers propagate to the
+        # root handler configured above instead of installing their own
+        access_log=False,
+        log_config=None
     )
 
 
@@ -0,0 +1,38 @@
+"""
+Shared test fixtures.
+
+Set VAD_MODEL_PATH to a local silero_vad.onnx to avoid the download on first use.
+"""
+
+import io
+
+import av
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+
+def encode_audio(fmt: str, codec: str, seconds: float = 2.0, sr: int = 44100) -> bytes:
+    """Encode a stereo test tone in memory with PyAV."""
+    t = np.arange(int(seconds * sr)) / sr
+    tone = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    
+    buffer = io.BytesIO()
+    with av.open(buffer, mode="w", format=fmt) as container:
+        stream = container.add_stream(codec, rate=sr)
+        stream.layout = "stereo"
+        frame = av.AudioFrame.from_ndarray(np.stack([tone, tone]), format="fltp", layout="stereo")
+        frame.sample_rate = sr
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from src.main import api_app
+    
+    with TestClient(api_app) as test_client:
+        yield test_client
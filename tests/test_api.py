@@ -0,0 +1,68 @@
+"""
+Tests for the FastAPI endpoints.
+"""
+
+import io
+
+import numpy as np
+import soundfile as sf
+
+from .conftest import encode_audio
+
+
+def test_process_mp3_upload(client):
+    """Non-libsndfile formats are decoded from the spooled upload via PyAV."""
+    response = client.post(
+        "/process",
+        files={"file": ("tone.mp3", encode_audio("mp3", "libmp3lame"), "audio/mpeg")}
+    )
+    
+    assert response.status_code == 200
+    audio, sr = sf.read(io.BytesIO(response.content), dtype="int16")
+    assert sr == 16000
+    assert audio.ndim == 1
+
+
+def test_process_empty_wav(client):
+    """An upload with no samples yields an empty WAV rather than an error."""
+    buffer = io.BytesIO()
+    sf.write(buffer, np.zeros(0, dtype=np.int16), 16000, format="WAV", subtype="PCM_16")
+    
+    response = client.post(
+        "/process",
+        files={"file": ("empty.wav", buffer.getvalue(), "audio/wav")}
+    )
+    
+    assert response.status_code == 200
+    audio, _ = sf.read(io.BytesIO(response.content), dtype="int16")
+    assert len(audio) == 0
+
+
+def test_upload_limit_allows_multipart_overhead(monkeypatch):
+    """A file just under the limit isn't rejected for its multipart framing."""
+    from fastapi.testclient import TestClient
+    from src.api import _MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware, app, settings
+    
+    monkeypatch.setattr(settings.processing, "max_file_size_mb", 1)
+    limit = 1024 * 1024
+    limited = TestClient(UploadSizeLimitMiddleware(app, max_bytes=limit + _MULTIPART_OVERHEAD_BYTES))
+    
+    # Within the limit: a valid WAV just under it, whose framing takes the
+    # request body past the limit, is passed through and processed
+    n_samples = (limit - 100 - 44) // 2
+    tone = 0.3 * np.sin(2 * np.pi * 440 * np.arange(n_samples) / 16000)
+    buffer = io.BytesIO()
+    sf.write(buffer, tone, 16000, format="WAV", subtype="PCM_16")
+    assert limit - 100 - len(buffer.getvalue()) < 2
+    response = limited.post("/process", files={"file": ("a.wav", buffer.getvalue(), "audio/wav")})
+    assert response.status_code == 200
+    
+    # Just over the limit: passes the middleware, rejected by the exact check
+    response = limited.post("/process", files={"file": ("a.wav", b"\0" * (limit + 100), "audio/wav")})
+    assert response.status_code == 413
+    assert "File too large" in response.json()["detail"]
+    
+    # Far over the limit: refused from Content-Length alone
+    response = limited.post("/process", files={"file": ("a.wav", b"\0" * (2 * limit), "audio/wav")})
+    assert response.status_code == 413
+    assert "Request body too large" in response.json()["detail"]
@@ -0,0 +1,147 @@
+"""
+Tests for the audio processing pipeline.
+"""
+
+import io
+import os
+
+import numpy as np
+import onnxruntime as ort
+import pytest
+import soundfile as sf
+from scipy.signal import lfilter
+
+from src.audio_processor import SileroVAD, get_processor
+
+
+def _write_scaled_model(path, scale: float) -> None:
+    """Write a tiny model with Silero's interface whose output is scale * mean(input)."""
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper
+    
+    graph = helper.make_graph(
+        [
+            helper.make_node("ReduceMean", ["input"], ["mean"], axes=[1], keepdims=1),
+            helper.make_node("Mul", ["mean", "scale"], ["output"]),
+            helper.make_node("Identity", ["state"], ["stateN"]),
+        ],
+        "scaled_mean",
+        [
+            helper.make_tensor_value_info("input", TensorProto.FLOAT, [None, None]),
+            helper.make_tensor_value_info("state", TensorProto.FLOAT, [2, None, 128]),
+            helper.make_tensor_value_info("sr", TensorProto.INT64, []),
+        ],
+        [
+            helper.make_tensor_value_info("output", TensorProto.FLOAT, [None, 1]),
+            helper.make_tensor_value_info("stateN", TensorProto.FLOAT, [2, None, 128]),
+        ],
+        [helper.make_tensor("scale", TensorProto.FLOAT, [], [scale])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+
+def _synthetic_speech(seconds: float, sr: int = 16000, seed: int = 0) -> np.ndarray:
+    """Formant-synthesised vowel runs separated by pauses, over light noise."""
+    rng = np.random.default_rng(seed)
+    vowels = [(730, 1090, 2440), (270, 2290, 3010), (300, 870, 2240), (530, 1840, 2480)]
+    parts, total = [], 0
+    while total < seconds * sr:
+        for _ in range(rng.integers(3, 12)):
+            n = int(rng.uniform(0.12, 0.3) * sr)
+            t = np.arange(n) / sr
+            phase = np.cumsum(rng.uniform(100, 180) * (1 + 0.1 * np.sin(2 * np.pi * 3 * t)) / sr)
+            y = (np.diff(np.floor(phase), prepend=0) > 0).astype(np.float64)
+            for freq, bw in zip(vowels[rng.integers(len(vowels))], (80, 100, 120)):
+                r = np.exp(-np.pi * bw / sr)
+                y = lfilter([1 - r], [1, -2 * r * np.cos(2 * np.pi * freq / sr), r * r], y)
+            parts.append(0.3 * y / (np.abs(y).max() + 1e-9) * np.hanning(n))
+            total += n
+        gap = int(rng.uniform(0.3, 1.2) * sr)
+        parts.append(np.zeros(gap))
+        total += gap
+    audio = np.concatenate(parts)
+    return (audio + 0.03 * rng.standard_normal(len(audio))).astype(np.float32)
+
+
+def _sequential_probs(vad: SileroVAD, audio: np.ndarray, window: int = 512) -> np.ndarray:
+    """Reference pass: one window at a time, LSTM state chained throughout."""
+    padded = np.concatenate([np.zeros(64, np.float32), audio, np.zeros(window, np.float32)])
+    state = np.zeros((2, 1, 128), dtype=np.float32)
+    sr = np.array(16000, dtype=np.int64)
+    probs = []
+    for i in range(-(-len(audio) // window)):
+        frame = padded[i * window:i * window + 64 + window][None, :]
+        out, state = vad._session.run(None, {"input": frame, "state": state, "sr": sr})
+        probs.append(out[0, 0])
+    return np.array(probs, dtype=np.float32)
+
+
+def _run(session) -> float:
+    out, _ = session.run(None, {
+        "input": np.ones((1, 576), dtype=np.float32),
+        "state": np.zeros((2, 1, 128), dtype=np.float32),
+        "sr": np.array(16000, dtype=np.int64),
+    })
+    return float(out[0, 0])
+
+
+def test_optimized_graph_cache_tracks_model_swap(tmp_path, monkeypatch):
+    """Replacing the model file (even with an older mtime) never reuses its cached graph."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    model = tmp_path / "silero_vad.onnx"
+    
+    _write_scaled_model(model, 1.0)
+    assert _run(SileroVAD._create_session(ort, model)) == pytest.approx(1.0)
+    
+    # Swap in a different model with the same name and an older timestamp
+    _write_scaled_model(model, 2.0)
+    os.utime(model, (0, 0))
+    assert _run(SileroVAD._create_session(ort, model)) == pytest.approx(2.0)
+
+
+def test_pyav_and_soundfile_downmix_match():
+    """The same stereo signal comes out at the same level from either decoder."""
+    sr = get_processor()._target_sr
+    t = np.arange(sr) / sr
+    tone = (0.6 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    # Tone on the left channel only, so any non-equal-weight downmix shows up
+    stereo = np.stack([tone, np.zeros_like(tone)], axis=1)
+    buffer = io.BytesIO()
+    sf.write(buffer, stereo, sr, format="WAV", subtype="FLOAT")
+    data = buffer.getvalue()
+    
+    peaks = []
+    for filename in ("tone.wav", "tone"):  # soundfile, then PyAV
+        audio, _, _, channels = get_processor()._load_audio(data, filename)
+        assert channels == 2
+        peaks.append(np.abs(audio.mean(axis=1)).max())
+    
+    assert peaks[1] == pytest.approx(peaks[0], rel=0.01)
+    assert peaks[0] == pytest.approx(0.3, rel=0.01)
+
+
+def test_batched_vad_matches_sequential():
+    """Default VAD is exactly sequential; opt-in batching stays within tolerance."""
+    vad = SileroVAD()
+    vad._load_model()
+    # Long enough to be split into two streams at batch_size=4
+    audio = _synthetic_speech(600)
+    
+    reference = _sequential_probs(vad, audio)
+    expected = vad._probs_to_segments(reference, 512, 16000, len(audio))
+    assert expected
+    
+    assert vad._params["batch_size"] == 1
+    probs = vad._speech_probs(audio, 16000, 512)
+    np.testing.assert_allclose(probs, reference, atol=1e-5)
+    assert vad._probs_to_segments(probs, 512, 16000, len(audio)) == expected
+    
+    vad._params["batch_size"] = 4
+    probs = vad._speech_probs(audio, 16000, 512)
+    segments = vad._probs_to_segments(probs, 512, 16000, len(audio))
+    speech = lambda segs: sum(s["end"] - s["start"] for s in segs)
+    assert np.mean((probs > 0.5) != (reference > 0.5)) < 1e-3
+    assert len(segments) == pytest.approx(len(expected), abs=2)
+    assert speech(segments) == pytest.approx(speech(expected), rel=2e-3)
@@ -0,0 +1,17 @@
+"""
+Tests for settings validation.
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from src.config import AppSettings, ProcessingSettings, ServerSettings
+
+
+def test_process_pool_rejects_multiple_workers():
+    """Each uvicorn worker would otherwise start its own process pool."""
+    with pytest.raises(ValidationError, match="SERVER_WORKERS=1"):
+        AppSettings(
+            processing=ProcessingSettings(process_pool=True),
+            server=ServerSettings(workers=2)
+        )